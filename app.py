@@ -1,12 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
 
-import dspy
 import gradio as gr
 from dotenv import load_dotenv
-from dspy.signatures.signature import Signature
 
-import signaturize
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj: object) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: object) -> str:
+        return json.dumps(obj, indent=2)
+
+
+# Gradio resolves the type hints of event handlers at runtime, so handlers
+# annotate dspy objects with Any rather than these TYPE_CHECKING-only names.
+if TYPE_CHECKING:
+    import dspy
+    from dspy.signatures.signature import Signature
 
 load_dotenv()
 
@@ -14,15 +41,53 @@ API_KEY = os.getenv("API_KEY")
 API_BASE = os.getenv("API_BASE")
 MODEL_NAME = os.getenv("MODEL_NAME")
 GRADIO_PORT = int(os.getenv("GRADIO_PORT", "7860"))
-
-
-def get_fields_by_type(signature: type[Signature], field_type: str) -> list[str]:
-    """Extracts field names from a dspy.Signature based on their type."""
-    return [
+PREDICTION_CACHE_SIZE = 1024
+MAX_CONCURRENCY = 32
+LM_POOL_SIZE = 16
+
+# LMs shared by all Gradio sessions, so litellm reuses one HTTP client per
+# endpoint. Session state only carries the pool key; the least recently used
+# LM is dropped once LM_POOL_SIZE is exceeded.
+_LM_POOL: OrderedDict[tuple[str, str, str], dspy.LM] = OrderedDict()
+_lm_pool_lock = threading.Lock()
+
+_dspy: ModuleType | None = None
+_dspy_lock = threading.Lock()
+
+
+def _get_dspy() -> ModuleType:
+    """Imports dspy on first use, keeping it off the app startup path."""
+    global _dspy
+    with _dspy_lock:
+        if _dspy is None:
+            import dspy
+
+            # dspy.asyncify shares one process-wide limiter sized by
+            # async_max_workers. Size it once for the slider maximum; each batch
+            # is bounded by its own semaphore in run_batch.
+            dspy.configure(async_max_workers=MAX_CONCURRENCY)
+            _dspy = dspy
+    return _dspy
+
+
+@functools.lru_cache(maxsize=128)
+def get_program(signature: type[Signature]) -> dspy.Predict:
+    """Returns a dspy.Predict for the signature, built once per signature class."""
+    dspy = _get_dspy()
+    import signaturize
+
+    program = dspy.Predict(signature)
+    program._input_fields = signaturize.field_names(signature, "input")
+    program._output_fields = signaturize.field_names(signature, "output")
+    program._input_template_json = _dumps(dict.fromkeys(program._input_fields, "..."))
+    # Only plain string outputs can be streamed token by token.
+    program._stream_fields = tuple(
         name
-        for name, field in signature.fields.items()
-        if field.json_schema_extra.get("__dspy_field_type") == field_type  # type: ignore
-    ]
+        for name in program._output_fields
+        if signature.output_fields[name].annotation is str
+    )
+    program._prediction_cache = OrderedDict()
+    return program
 
 
 EXAMPLE_CLASS_STRING = """
@@ -33,6 +98,14 @@ class BasicQA(dspy.Signature):
 """
 
 
+def warm_up_lm(lm: dspy.LM) -> None:
+    """Sends a one-token probe so the first prediction skips connection setup."""
+    try:
+        lm("ping", max_tokens=1, cache=False)
+    except Exception as e:
+        print(f"LM warm-up error: {e}")
+
+
 def configure_lm(
     api_key: str | None, api_base: str | None, model_name: str | None
 ) -> tuple[str, dict | None]:
@@ -40,74 +113,256 @@ def configure_lm(
 
     if model_name is None or api_key is None or api_base is None:
         return "❌ Error: Model Name, API Key, and API Base are required.", None
+    # The key is hashed in so sessions with different credentials never share an LM.
+    key = (model_name, api_base, hashlib.sha256(api_key.encode()).hexdigest())
     try:
-        lm = dspy.LM(model_name, api_key=api_key, api_base=api_base)
-        return "✅ LM Configured Successfully!", {"configured": lm}
+        with _lm_pool_lock:
+            lm = _LM_POOL.get(key)
+            if lm is None:
+                dspy = _get_dspy()
+                lm = _LM_POOL[key] = dspy.LM(
+                    model_name, api_key=api_key, api_base=api_base
+                )
+                if len(_LM_POOL) > LM_POOL_SIZE:
+                    _LM_POOL.popitem(last=False)
+                threading.Thread(target=warm_up_lm, args=(lm,), daemon=True).start()
+            else:
+                _LM_POOL.move_to_end(key)
+        return "✅ LM Configured Successfully!", {"key": key}
     except Exception as e:
         print(f"Configuration error: {e}")
         return f"❌ Configuration Error: {e}", None
 
 
+def get_lm(lm_state: dict | None) -> dspy.LM | None:
+    """Resolves the pooled LM referenced by a session's state."""
+    if not lm_state:
+        return None
+    key = lm_state.get("key")
+    with _lm_pool_lock:
+        lm = _LM_POOL.get(key)
+        if lm is not None:
+            _LM_POOL.move_to_end(key)
+    return lm
+
+
 def generate_signature(
     signature_string: str, prompt: str, mode: str, lm: dict | None
-) -> tuple[str, dspy.Predict | None, str, str]:
-    if not lm:
+) -> tuple[str, Any, str, str]:
+    lm = get_lm(lm)
+    if lm is None:
         return (
             "",
             None,
-            json.dumps({}, indent=2),
+            _dumps({}),
             "❌ Error: Configure the LM in the 'Configuration' tab first.",
         )
-    try:
-        if mode == "prompt":
+    dspy = _get_dspy()
+    import signaturize
 
-            lm = lm.get("configured")
+    if mode == "prompt":
+        try:
             with dspy.context(lm=lm):
                 signature_string = str(
                     signaturize.from_prompt(prompt, return_type="string")
                 )
-        signature = signaturize.from_dspy_string(signature_string)
-        program = dspy.Predict(signature)
+        # LM, network and output-parsing errors from dspy/litellm have no common base.
+        except Exception as e:
+            status = f"❌ Error generating signature ({type(e).__name__}): {e}"
+            return signature_string, None, _dumps({}), status
 
-        input_fields = get_fields_by_type(signature, "input")
-        input_template = dict.fromkeys(input_fields, "...")
-        input_template = json.dumps(input_template, indent=2)
+    try:
+        signature = signaturize.from_dspy_string(signature_string)
+    except RuntimeError as e:
+        # from_dspy_string wraps the underlying SyntaxError/ValueError/etc.
+        error_type = type(e.__cause__ or e).__name__
+        status = f"❌ Error loading signature ({error_type}): {e.__cause__ or e}"
+        return signature_string, None, _dumps({}), status
 
-        status = "✅ Signature Loaded. Ready to run."
-        return signature_string, program, input_template, status
+    program = get_program(signature)
 
-    except Exception as e:
-        return signature_string, None, json.dumps({}, indent=2), f"❌ Error: {e}"
+    status = "✅ Signature Loaded. Ready to run."
+    return signature_string, program, program._input_template_json, status
 
 
-def run_prediction(
-    program: dspy.Predict | None, input_data: str, lm: dict | None
-) -> tuple[dict, str]:
+def parse_inputs(input_data: str) -> dict | list:
+    """Parses a single JSON object, a JSON array or JSONL lines of input records."""
+    try:
+        return _loads(input_data)
+    except json.JSONDecodeError:
+        records = [_loads(line) for line in input_data.splitlines() if line.strip()]
+        # Empty input is an error, not an empty batch.
+        if not records:
+            raise
+        return records
+
+
+def get_parsed_inputs(program: dspy.Predict, input_data: str) -> dict | list:
+    """Parses the inputs, reusing the last result when the text is unchanged."""
+    last_raw, last_parsed = getattr(program, "_last_input", (None, None))
+    if input_data == last_raw:
+        return last_parsed
+    parsed = parse_inputs(input_data)
+    program._last_input = (input_data, parsed)
+    return parsed
+
+
+def get_output_dict(program: dspy.Predict, result: dspy.Prediction) -> dict:
+    """Collects the output fields of a prediction into a dictionary."""
+    return {field: getattr(result, field) for field in program._output_fields}
+
+
+def get_input_key(program: dspy.Predict, row: dict, lm_key: tuple) -> bytes:
+    """Hashes an input record so identical prompts share one LLM call."""
+    content = repr((lm_key, program._input_fields, tuple(sorted(row.items()))))
+    return hashlib.blake2b(content.encode()).digest()
+
+
+def get_cached_output(program: dspy.Predict, key: bytes) -> dict | None:
+    """Returns the cached output for an input key, marking it recently used."""
+    cache = program._prediction_cache
+    output = cache.get(key)
+    if output is not None:
+        cache.move_to_end(key)
+    return output
+
+
+def set_cached_output(program: dspy.Predict, key: bytes, output: dict) -> None:
+    """Caches an output dict, evicting the least recently used past the limit."""
+    cache = program._prediction_cache
+    cache[key] = output
+    cache.move_to_end(key)
+    if len(cache) > PREDICTION_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+async def run_batch(
+    program: dspy.Predict, rows: list[dict], lm: dspy.LM, max_concurrency: int
+) -> list:
+    """Runs the program over all rows concurrently, bounded by max_concurrency."""
+    aprogram = getattr(program, "_aprogram", None)
+    if aprogram is None:
+        aprogram = _get_dspy().asyncify(program)
+        program._aprogram = aprogram
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_row(row: dict) -> dspy.Prediction:
+        async with semaphore:
+            return await aprogram(lm=lm, **row)
+
+    return await asyncio.gather(*(run_row(row) for row in rows), return_exceptions=True)
+
+
+async def run_batch_prediction(
+    program: dspy.Predict,
+    rows: list[dict],
+    lm: dspy.LM,
+    lm_key: tuple,
+    max_concurrency: int,
+) -> tuple[list, str]:
+    """Runs a batch of input records, collapsing duplicates and cached records."""
+    keys = [get_input_key(program, row, lm_key) for row in rows]
+    resolved, pending = {}, {}
+    for key, row in zip(keys, rows, strict=True):
+        if key in resolved or key in pending:
+            continue
+        output = get_cached_output(program, key)
+        if output is None:
+            pending[key] = row
+        else:
+            resolved[key] = output
+
+    results = await run_batch(program, list(pending.values()), lm, max_concurrency)
+
+    failed_keys = set()
+    for key, result in zip(pending, results, strict=True):
+        if isinstance(result, Exception):
+            resolved[key] = {"error": str(result)}
+            failed_keys.add(key)
+        else:
+            resolved[key] = get_output_dict(program, result)
+            set_cached_output(program, key, resolved[key])
+
+    outputs = [resolved[key] for key in keys]
+    failed = sum(key in failed_keys for key in keys)
+    if failed:
+        return outputs, f"⚠️ Batch Complete: {failed}/{len(keys)} failed."
+    return outputs, f"✅ Batch Prediction Complete ({len(keys)} records)."
+
+
+async def run_prediction(
+    program: Any,
+    input_data: str,
+    lm: dict | None,
+    max_concurrency: int = 8,
+) -> AsyncIterator[tuple[dict | list, str]]:
 
     if program is None:
-        return {}, "❌ Error: No signature is loaded. Please generate one first."
-    if lm is None or lm.get("configured") is None:
-        return {}, "❌ Error: LM is not configured. Please configure it first."
-
-    lm = lm.get("configured")
-    input_data = json.loads(input_data)
+        yield {}, "❌ Error: No signature is loaded. Please generate one first."
+        return
+    lm_key = lm.get("key") if lm else None
+    lm = get_lm(lm)
+    if lm is None:
+        yield {}, "❌ Error: LM is not configured. Please configure it first."
+        return
+
+    dspy = _get_dspy()
+    try:
+        input_data = get_parsed_inputs(program, input_data)
+    except json.JSONDecodeError:
+        yield {}, "❌ Error: Input must be valid JSON."
+        return
+
+    if isinstance(input_data, list):
+        if not input_data:
+            yield [], "❌ Error: Input must contain at least one record."
+            return
+        if not all(isinstance(row, dict) for row in input_data):
+            yield [], "❌ Error: Every input record must be a JSON object."
+            return
+        yield await run_batch_prediction(
+            program,
+            input_data,
+            lm,
+            lm_key,
+            min(max(1, int(max_concurrency)), MAX_CONCURRENCY),
+        )
+        return
 
     if not isinstance(input_data, dict):
-        return {}, "❌ Error: Input must be valid JSON."
-
+        yield {}, "❌ Error: Input must be valid JSON."
+        return
+
+    key = get_input_key(program, input_data, lm_key)
+    output = get_cached_output(program, key)
+    if output is not None:
+        yield output, "✅ Prediction Complete (cached)."
+        return
+
+    # Listeners keep per-call buffers, so the program is streamified per call.
+    # As in the batch path, the LM is passed per call rather than through
+    # dspy.context, which also could not be held open across the yields below.
+    stream = dspy.streamify(
+        program,
+        stream_listeners=[
+            dspy.streaming.StreamListener(signature_field_name=field)
+            for field in program._stream_fields
+        ],
+    )
+    partial = dict.fromkeys(program._stream_fields, "")
     try:
-        # Run the prediction
-        with dspy.context(lm=lm):
-            result = program(**input_data)
-
-            # Extract output fields into a dictionary
-            output_fields = get_fields_by_type(program.signature, "output")
-            output_dict = {field: getattr(result, field) for field in output_fields}
-
-            return output_dict, "✅ Prediction Complete."
+        async for chunk in stream(lm=lm, **input_data):
+            if isinstance(chunk, dspy.streaming.StreamResponse):
+                partial[chunk.signature_field_name] += chunk.chunk
+                yield {k: v.strip() for k, v in partial.items()}, "⏳ Streaming..."
+            elif isinstance(chunk, dspy.Prediction):
+                # Extract output fields into a dictionary
+                output = get_output_dict(program, chunk)
+                set_cached_output(program, key, output)
+                yield output, "✅ Prediction Complete."
 
     except Exception as e:
-        return {}, f"❌ Error during prediction: {e}"
+        yield {}, f"❌ Error during prediction: {e}"
 
 
 # --- Gradio App ---
@@ -117,8 +372,7 @@ with gr.Blocks(theme=gr.themes.Default()) as demo:
     gr.Markdown("[github](https://github.com/williambrach/quick-call-dspy)")
 
     dspy_program = gr.State(None)
-    _, state = configure_lm(API_KEY, API_BASE, MODEL_NAME)
-    lm_configured_state = gr.State(state)
+    lm_configured_state = gr.State(None)
 
     run_status_md = gr.Markdown()
     # --- LM Configuration ---
@@ -170,6 +424,13 @@ with gr.Blocks(theme=gr.themes.Default()) as demo:
     with gr.Row():
         with gr.Column():
             input_json = gr.Code(label="Inputs", language="json", interactive=True)
+            max_concurrency_slider = gr.Slider(
+                label="Max concurrency (JSON array / JSONL inputs)",
+                minimum=1,
+                maximum=MAX_CONCURRENCY,
+                value=8,
+                step=1,
+            )
             run_button = gr.Button("Run Prediction", variant="primary")
         with gr.Column():
             output_json = gr.JSON(label="Output")
@@ -177,6 +438,12 @@ with gr.Blocks(theme=gr.themes.Default()) as demo:
     # --- Event Listeners ---
 
     # Configuration
+    # The LM from the environment is built after first paint so that importing
+    # dspy does not delay the initial page load.
+    demo.load(
+        fn=lambda: configure_lm(API_KEY, API_BASE, MODEL_NAME)[1],
+        outputs=[lm_configured_state],
+    )
     config_button.click(
         fn=configure_lm,
         inputs=[api_key_box, api_base_box, model_name_box],
@@ -203,7 +470,12 @@ with gr.Blocks(theme=gr.themes.Default()) as demo:
     # Prediction
     run_button.click(
         fn=run_prediction,
-        inputs=[dspy_program, input_json, lm_configured_state],
+        inputs=[
+            dspy_program,
+            input_json,
+            lm_configured_state,
+            max_concurrency_slider,
+        ],
         outputs=[output_json, run_status_md],
     )
 
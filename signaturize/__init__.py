@@ -1,12 +1,141 @@
+import ast
+import re
+import typing
+from functools import lru_cache
+from types import CodeType
+from typing import Any
+
 import dspy
 
 from signaturize.signature_generator import SignatureGenerator
 
+# Names available to signature source, both for annotations evaluated from the
+# AST and for the exec fallback.
+_NAMESPACE = {
+    "dspy": dspy,
+    **{
+        name: getattr(typing, name)
+        for name in ("Any", "Dict", "List", "Literal", "Optional")
+    },
+}
+
+_ANNOTATION_BUILTINS = {
+    builtin.__name__: builtin for builtin in (str, int, float, bool, list, dict)
+}
+
+_FIELD_FACTORIES = {
+    "dspy.InputField": dspy.InputField,
+    "dspy.OutputField": dspy.OutputField,
+}
+
+# Node types allowed in a field annotation, e.g. `list[str]`, `Literal["a", "b"]`,
+# `dspy.Image` or `str | None`.
+_ANNOTATION_NODES = (
+    ast.Expression,
+    ast.Name,
+    ast.Attribute,
+    ast.Subscript,
+    ast.Tuple,
+    ast.List,
+    ast.Constant,
+    ast.BinOp,
+    ast.BitOr,
+    ast.Load,
+)
+
+
+_CLASS_NAME_RE = re.compile(r"^class\s+(\w+)\s*\(", re.MULTILINE)
+
+
+@lru_cache(maxsize=128)
+def _compile(cls_string: str) -> CodeType:
+    return compile(cls_string, "<signature>", "exec")
+
+
+def _eval_annotation(node: ast.expr) -> Any:
+    expression = ast.Expression(node)
+    for child in ast.walk(expression):
+        if not isinstance(child, _ANNOTATION_NODES):
+            raise ValueError(f"Unsupported annotation: {ast.unparse(node)}")
+        if isinstance(child, ast.Attribute) and child.attr.startswith("_"):
+            raise ValueError(f"Unsupported annotation: {ast.unparse(node)}")
+    code = compile(expression, "<signature>", "eval")
+    return eval(code, {"__builtins__": {}, **_ANNOTATION_BUILTINS, **_NAMESPACE})
+
+
+def _from_class_ast(cls_string: str) -> type[dspy.Signature] | None:
+    """
+    Builds the signature with type() from a single plain class definition.
+
+    Returns None when the source has any other shape, so the caller can fall
+    back to exec.
+    """
+    module = ast.parse(cls_string, "<signature>")
+    if len(module.body) != 1 or not isinstance(module.body[0], ast.ClassDef):
+        return None
+    classdef = module.body[0]
+    if (
+        classdef.decorator_list
+        or classdef.keywords
+        or len(classdef.bases) != 1
+        or ast.unparse(classdef.bases[0]) != "dspy.Signature"
+    ):
+        return None
+
+    class_attrs = {"__annotations__": {}}
+    body = classdef.body
+    docstring = ast.get_docstring(classdef)
+    if docstring is not None:
+        class_attrs["__doc__"] = docstring
+        body = body[1:]
+
+    for node in body:
+        if not (
+            isinstance(node, ast.AnnAssign)
+            and isinstance(node.target, ast.Name)
+            and isinstance(node.value, ast.Call)
+        ):
+            return None
+        call = node.value
+        field_factory = _FIELD_FACTORIES.get(ast.unparse(call.func))
+        if field_factory is None or call.args:
+            return None
+        try:
+            field_kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+            py_type = _eval_annotation(node.annotation)
+        except (ValueError, TypeError, NameError):
+            return None
+        if None in field_kwargs:
+            return None
+
+        class_attrs[node.target.id] = field_factory(**field_kwargs)
+        class_attrs["__annotations__"][node.target.id] = py_type
+
+    return type(classdef.name, (dspy.Signature,), class_attrs)
+
 
 def from_dspy_string(cls_string: str) -> type[dspy.Signature]:
+    return _from_dspy_string(cls_string.strip())
+
+
+@lru_cache(maxsize=128)
+def _from_dspy_string(cls_string: str) -> type[dspy.Signature]:
     try:
-        namespace = {"dspy": dspy}
-        exec(cls_string, namespace)
+        signature = _from_class_ast(cls_string)
+        if signature is not None:
+            return signature
+
+        namespace = dict(_NAMESPACE)
+        exec(_compile(cls_string), namespace)
+
+        # With a single top-level class statement, fetch it by name instead of
+        # scanning everything exec put into the namespace.
+        declared_names = _CLASS_NAME_RE.findall(cls_string)
+        if len(declared_names) == 1:
+            obj = namespace.get(declared_names[0])
+            if isinstance(obj, dspy.SignatureMeta) and obj is not dspy.Signature:
+                return obj
+
         signature_classes = []
         for obj in namespace.values():
             if isinstance(obj, dspy.SignatureMeta) and obj is not dspy.Signature:
@@ -30,6 +159,25 @@ def from_dspy_string(cls_string: str) -> type[dspy.Signature]:
         raise RuntimeError(f"An unexpected error occurred: {e}") from e
 
 
+@lru_cache(maxsize=64)
+def field_names(
+    signature: type[dspy.Signature], role: str = "input"
+) -> tuple[str, ...]:
+    """
+    Returns the names of the signature's input or output fields.
+
+    Results are cached per (signature, role), so repeated calls skip the walk over
+    signature.fields and the json_schema_extra lookups.
+    """
+    if role not in {"input", "output"}:
+        raise ValueError("role must be either 'input' or 'output'")
+    return tuple(
+        name
+        for name, field in signature.fields.items()
+        if field.json_schema_extra.get("__dspy_field_type") == role
+    )
+
+
 def from_prompt(
     prompt: str, return_type: str = "signature"
 ) -> type | str:
@@ -27,6 +27,38 @@ class FieldType(str, Enum):
     OPTIONAL_FLOAT = "Optional[float]"
 
 
+_TYPE_MAP = {
+    FieldType.STRING: str,
+    FieldType.INTEGER: int,
+    FieldType.FLOAT: float,
+    FieldType.BOOLEAN: bool,
+    FieldType.LIST_STRING: List[str],
+    FieldType.LIST_INT: List[int],
+    FieldType.LIST_FLOAT: List[float],
+    FieldType.DICT_STR_STR: Dict[str, str],
+    FieldType.DICT_STR_INT: Dict[str, int],
+    FieldType.DICT_STR_ANY: Dict[str, Any],
+    FieldType.OPTIONAL_STR: Optional[str],
+    FieldType.OPTIONAL_INT: Optional[int],
+    FieldType.OPTIONAL_FLOAT: Optional[float],
+    FieldType.IMAGE: dspy.Image,
+    FieldType.AUDIO: dspy.Audio,
+}
+
+_TYPING_IMPORT = {
+    FieldType.LITERAL: "Literal",
+    FieldType.OPTIONAL_STR: "Optional",
+    FieldType.OPTIONAL_INT: "Optional",
+    FieldType.OPTIONAL_FLOAT: "Optional",
+    FieldType.LIST_STRING: "List",
+    FieldType.LIST_INT: "List",
+    FieldType.LIST_FLOAT: "List",
+    FieldType.DICT_STR_STR: "Dict",
+    FieldType.DICT_STR_INT: "Dict",
+    FieldType.DICT_STR_ANY: "Dict",
+}
+
+
 class FieldRole(str, Enum):
     INPUT = "input"
     OUTPUT = "output"
@@ -47,18 +79,14 @@ class GeneratedField(BaseModel):
 
     def to_dspy_field_code(self) -> str:
         if self.type == FieldType.LITERAL and self.literal_values:
-            type_annotation = (
-                f"Literal[{', '.join(repr(v) for v in self.literal_values)}]"
-            )
+            type_annotation = f"Literal[{', '.join(map(repr, self.literal_values))}]"
         else:
             type_annotation = self.type.value
 
         field_type = "InputField" if self.role == FieldRole.INPUT else "OutputField"
+        desc = f'desc="{self.description}"' if self.description else ""
 
-        if self.description:
-            return f'{self.name}: {type_annotation} = dspy.{field_type}(desc="{self.description}")'
-        else:
-            return f"{self.name}: {type_annotation} = dspy.{field_type}()"
+        return f"{self.name}: {type_annotation} = dspy.{field_type}({desc})"
 
 
 class SignatureGeneration(dspy.Signature):
@@ -77,19 +105,25 @@ class SignatureGeneration(dspy.Signature):
 
 
 class SignatureGenerator(dspy.Module):
+    # Shared across instances; JSONAdapter skips ChatAdapter's chat formatting
+    # for this single-shot, structured-output call.
+    _adapter = dspy.JSONAdapter()
+
     def __init__(self):
         super().__init__()
         self.generator = dspy.Predict(SignatureGeneration)
+        self.generator.demos = []
 
     def forward(self, prompt: str):
         """Generate DSPy signature and return raw prediction attributes"""
-        result = self.generator(prompt=prompt)
+        with dspy.context(adapter=self._adapter):
+            result = self.generator(prompt=prompt)
 
         return dspy.Prediction(
             signature_name=result.signature_name,
             task_description=result.task_description,
             signature_fields=result.signature_fields,
-            reasoning=result.reasoning if hasattr(result, "reasoning") else None,
+            reasoning=getattr(result, "reasoning", None),
         )
 
     def generate_signature(self, prompt: str) -> Dict[str, Any]:
@@ -157,50 +191,30 @@ class SignatureGenerator(dspy.Module):
     @staticmethod
     def _get_python_type_from_field(field: "GeneratedField") -> type:
         """Converts a GeneratedField into a Python type for annotations."""
-        type_str = field.type.value
-
-        type_map = {
-            "str": str,
-            "int": int,
-            "float": float,
-            "bool": bool,
-            "list[str]": List[str],
-            "list[int]": List[int],
-            "list[float]": List[float],
-            "dict[str, str]": Dict[str, str],
-            "dict[str, int]": Dict[str, int],
-            "dict[str, Any]": Dict[str, Any],
-            "Optional[str]": Optional[str],
-            "Optional[int]": Optional[int],
-            "Optional[float]": Optional[float],
-            "dspy.Image": dspy.Image,
-            "dspy.Audio": dspy.Audio,
-        }
-
         if field.type == FieldType.LITERAL and field.literal_values:
             return Literal[tuple(field.literal_values)]
 
-        if type_str in type_map:
-            return type_map[type_str]
+        py_type = _TYPE_MAP.get(field.type)
+        if py_type is not None:
+            return py_type
 
         raise TypeError(
-            f"Unsupported field type for dynamic class creation: {type_str}"
+            f"Unsupported field type for dynamic class creation: {field.type.value}"
         )
 
     @classmethod
     def generate_code(cls, prediction) -> str:
         """Generate Python code from a signature prediction"""
-        imports = cls.get_required_imports(prediction.signature_fields)
+        # Imports (see get_required_imports) are not emitted, so they are
+        # not computed here either.
+        fields = prediction.signature_fields
 
-        code_lines = []
-        # code_lines.extend(imports)
-        # code_lines.append("")
-        code_lines.append(f"class {prediction.signature_name}(dspy.Signature):")
-        code_lines.append(f'    """{prediction.task_description}"""')
-        code_lines.append("")
+        code_lines = [""] * (3 + len(fields))
+        code_lines[0] = f"class {prediction.signature_name}(dspy.Signature):"
+        code_lines[1] = f'    """{prediction.task_description}"""'
 
-        for field in prediction.signature_fields:
-            code_lines.append(f"    {field.to_dspy_field_code()}")
+        for i, field in enumerate(fields, start=3):
+            code_lines[i] = f"    {field.to_dspy_field_code()}"
 
         return "\n".join(code_lines)
 
@@ -208,32 +222,15 @@ class SignatureGenerator(dspy.Module):
     def get_required_imports(cls, fields: List[GeneratedField]) -> List[str]:
         """Determine required imports based on field types"""
         imports = ["import dspy"]
-        typing_imports = set()
-
-        for field in fields:
-            if field.type == FieldType.LITERAL:
-                typing_imports.add("Literal")
-            elif field.type in [
-                FieldType.OPTIONAL_STR,
-                FieldType.OPTIONAL_INT,
-                FieldType.OPTIONAL_FLOAT,
-            ]:
-                typing_imports.add("Optional")
-            elif field.type in [
-                FieldType.LIST_STRING,
-                FieldType.LIST_INT,
-                FieldType.LIST_FLOAT,
-            ]:
-                typing_imports.add("List")
-            elif field.type in [
-                FieldType.DICT_STR_STR,
-                FieldType.DICT_STR_INT,
-                FieldType.DICT_STR_ANY,
-            ]:
-                typing_imports.add("Dict")
-
-            if field.type == FieldType.DICT_STR_ANY:
-                typing_imports.add("Any")
+        field_types = {field.type for field in fields}
+        typing_imports = {
+            _TYPING_IMPORT[field_type]
+            for field_type in field_types
+            if field_type in _TYPING_IMPORT
+        }
+
+        if FieldType.DICT_STR_ANY in field_types:
+            typing_imports.add("Any")
 
         if typing_imports:
             imports.append(